@@ -1,9 +1,14 @@
-from binaryninja import log_info
+from binaryninja import log_info, PluginCommand
 from .chip8 import Chip8
 from .view import Chip8View
+from .sprites import show_sprites, export_sprites
 
 Chip8.register()
 Chip8View.register()
+PluginCommand.register('CHIP-8\\Show Sprites', 'Preview the sprites referenced by LD I / DRW pairs', show_sprites,
+    lambda bv: bv.arch is not None and bv.arch.name == Chip8.name)
+PluginCommand.register('CHIP-8\\Export Sprite Sheet', 'Save the ROM sprites as a PNG or PGM contact sheet', export_sprites,
+    lambda bv: bv.arch is not None and bv.arch.name == Chip8.name)
 """
 Because the CHIP-8 is an interpreted language, the ROM image contains no magic constant.
 If you have multiple 3rd party Architecture plugins and you want to load a non-CHIP-8 image,
@@ -0,0 +1,193 @@
+"""
+Sprite extraction for CHIP-8 ROMs.
+
+Sprites are located by pairing every 'LD I, addr' (Annn) with the first 'DRW Vx, Vy, n' (Dxyn)
+that follows it, the DRW height giving the number of sprite rows at addr.
+All candidates are unpacked at once into a single atlas array of shape (count, 15, 8)
+which can be rendered as a PNG/PGM contact sheet.
+
+This module does not depend on binaryninja, so it can also be run headless over a ROM directory:
+
+    python sprites.py roms/ out/ --format png
+"""
+import argparse
+import os
+import struct
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+ROM_BASE = 0x200
+SPRITE_WIDTH = 8
+SPRITE_HEIGHT = 15
+LOOKAHEAD = 16
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Sprite extraction requires numpy (pip install numpy)")
+
+
+def find_sprites(rom, base=ROM_BASE, lookahead=LOOKAHEAD):
+    """
+    Return the (addrs, heights) arrays of candidate sprites in the ROM image.
+    An LD I only counts if a DRW follows within lookahead instructions and no other LD I comes first.
+    """
+    _require_numpy()
+    words = np.frombuffer(bytes(rom[:len(rom) & ~1]), dtype='>u2')
+    ld_i = np.flatnonzero((words >> 12) == 0xA)
+    drw = np.flatnonzero((words >> 12) == 0xD)
+    if not len(ld_i) or not len(drw):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    next_ld = np.append(ld_i[1:], len(words))
+    nxt = np.searchsorted(drw, ld_i, side='right')
+    found = nxt < len(drw)
+    ld_i, next_ld, draw = ld_i[found], next_ld[found], drw[nxt[found]]
+    paired = (draw < next_ld) & (draw - ld_i <= lookahead)
+    ld_i, draw = ld_i[paired], draw[paired]
+
+    addrs = (words[ld_i] & 0xfff).astype(np.int64)
+    heights = (words[draw] & 0xf).astype(np.int64)
+    inside = (heights > 0) & (addrs >= base) & (addrs + heights <= base + len(rom))
+    keys = np.unique((addrs[inside] << 4) | heights[inside])
+    return keys >> 4, keys & 0xf
+
+
+def build_atlas(rom, addrs, heights, base=ROM_BASE):
+    """ Unpack all sprites into a (count, SPRITE_HEIGHT, SPRITE_WIDTH) array of 0/1 pixels """
+    _require_numpy()
+    data = np.frombuffer(bytes(rom), dtype=np.uint8)
+    count = len(addrs)
+    starts = np.cumsum(heights) - heights
+    sprite = np.repeat(np.arange(count), heights)
+    row = np.arange(int(heights.sum())) - np.repeat(starts, heights)
+    cells = np.zeros((count, SPRITE_HEIGHT), dtype=np.uint8)
+    cells[sprite, row] = data[np.repeat(addrs - base, heights) + row]
+    return np.unpackbits(cells, axis=1).reshape(count, SPRITE_HEIGHT, SPRITE_WIDTH)
+
+
+def contact_sheet(atlas, columns=16, scale=4, pad=1):
+    """ Tile the atlas into a grayscale image, lit pixels are white on a dark grid """
+    _require_numpy()
+    count = max(len(atlas), 1)
+    columns = min(columns, count)
+    rows = -(-count // columns)
+    cells = np.zeros((rows * columns, SPRITE_HEIGHT, SPRITE_WIDTH), dtype=np.uint8)
+    cells[:len(atlas)] = atlas * 0xff
+    cells = np.pad(cells, ((0, 0), (0, pad), (0, pad)), constant_values=0x40)
+    height, width = cells.shape[1:]
+    sheet = cells.reshape(rows, columns, height, width).transpose(0, 2, 1, 3).reshape(rows * height, columns * width)
+    sheet = np.pad(sheet, ((pad, 0), (pad, 0)), constant_values=0x40)
+    return sheet.repeat(scale, axis=0).repeat(scale, axis=1)
+
+
+def encode_pgm(image):
+    """ Binary (P5) PGM of an 8-bit grayscale image """
+    height, width = image.shape
+    return b'P5\n%d %d\n255\n' % (width, height) + image.astype(np.uint8).tobytes()
+
+
+def encode_png(image):
+    """ 8-bit grayscale PNG, no filtering """
+    def chunk(tag, body):
+        return struct.pack('>I', len(body)) + tag + body + struct.pack('>I', zlib.crc32(tag + body) & 0xffffffff)
+
+    height, width = image.shape
+    raw = np.zeros((height, width + 1), dtype=np.uint8)
+    raw[:, 1:] = image
+    return (b'\x89PNG\r\n\x1a\n' +
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)) +
+        chunk(b'IDAT', zlib.compress(raw.tobytes(), 9)) +
+        chunk(b'IEND', b''))
+
+
+def encode_sheet(image, fmt):
+    if fmt == 'png':
+        return encode_png(image)
+    if fmt == 'pgm':
+        return encode_pgm(image)
+    raise ValueError("Unsupported sprite sheet format: {}".format(fmt))
+
+
+def extract(rom, base=ROM_BASE):
+    """ Return (addrs, heights, atlas) for the ROM image """
+    addrs, heights = find_sprites(rom, base)
+    return addrs, heights, build_atlas(rom, addrs, heights, base)
+
+
+def _extract_file(job):
+    """ Process pool worker, writes the contact sheet for one ROM """
+    path, out_dir, fmt = job
+    with open(path, 'rb') as f:
+        rom = f.read()
+    addrs, heights, atlas = extract(rom)
+    if len(atlas):
+        name = os.path.splitext(os.path.basename(path))[0] + '.' + fmt
+        with open(os.path.join(out_dir, name), 'wb') as f:
+            f.write(encode_sheet(contact_sheet(atlas), fmt))
+    return path, len(atlas)
+
+
+def batch(rom_dir, out_dir, fmt='png', workers=None):
+    """ Extract the sprite sheets of every ROM in rom_dir using a process pool """
+    _require_numpy()
+    os.makedirs(out_dir, exist_ok=True)
+    paths = sorted(os.path.join(rom_dir, name) for name in os.listdir(rom_dir))
+    jobs = [(path, out_dir, fmt) for path in paths if os.path.isfile(path)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_extract_file, jobs))
+
+
+def show_sprites(bv):
+    """ Plugin command, preview the sprite sheet of the opened ROM in an HTML report """
+    from base64 import b64encode
+    rom = bv.read(ROM_BASE, bv.end - ROM_BASE)
+    addrs, heights, atlas = extract(rom)
+    if not len(atlas):
+        bv.show_plain_text_report('CHIP-8 Sprites', 'No sprites found.')
+        return
+    png = b64encode(encode_png(contact_sheet(atlas))).decode()
+    rows = ''.join('<tr><td>{}</td><td>{:#x}</td><td>{}</td></tr>'.format(i, addr, height)
+        for i, (addr, height) in enumerate(zip(addrs, heights)))
+    bv.show_html_report('CHIP-8 Sprites',
+        '<img src="data:image/png;base64,{}" style="image-rendering: pixelated"/>'
+        '<table><tr><th>#</th><th>Address</th><th>Height</th></tr>{}</table>'.format(png, rows))
+
+
+def export_sprites(bv):
+    """ Plugin command, save the sprite sheet of the opened ROM as PNG or PGM """
+    from binaryninja.interaction import get_save_filename_input
+    from binaryninja.log import log_info
+    path = get_save_filename_input('Save sprite sheet', 'png')
+    if not path:
+        return
+    if isinstance(path, bytes):
+        path = path.decode()
+    fmt = 'pgm' if path.lower().endswith('.pgm') else 'png'
+    addrs, heights, atlas = extract(bv.read(ROM_BASE, bv.end - ROM_BASE))
+    with open(path, 'wb') as f:
+        f.write(encode_sheet(contact_sheet(atlas), fmt))
+    log_info("Saved {} CHIP-8 sprites to {}".format(len(atlas), path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract CHIP-8 sprite sheets from a directory of ROMs.')
+    parser.add_argument('rom_dir')
+    parser.add_argument('out_dir')
+    parser.add_argument('--format', choices=['png', 'pgm'], default='png')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+    for path, count in batch(args.rom_dir, args.out_dir, args.format, args.workers):
+        print("{}: {} sprites".format(path, count))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())